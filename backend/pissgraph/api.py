@@ -1,174 +1,386 @@
+import random
+from collections.abc import Iterator
 from datetime import UTC
 from datetime import datetime
 from datetime import timedelta
+from typing import Any
+from typing import Literal
 
+import orjson
+from cachetools import TTLCache
+from fastapi import Depends
 from fastapi import FastAPI
 from fastapi import HTTPException
 from fastapi import Query
+from fastapi import Request
+from fastapi import Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from pydantic import ConfigDict
 
 from .database import Database
+from .database import TelemetryReading
 
+# Health probes hit this many times per second; serve preserialized bytes
+# instead of running the body through the response pipeline every call
+_HEALTH_BODY = b'{"status":"healthy"}'
 
+# Responses above this many points are streamed in chunks instead of
+# serialized into one contiguous buffer
+_STREAM_THRESHOLD = 5000
+_STREAM_CHUNK = 1000
+
+
+# Response models are built once and never mutated; frozen instances let
+# pydantic-core skip the __setattr__ machinery on construction
 class TelemetryDataPoint(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     timestamp: datetime
     urine_tank_level: float
 
 
 class TelemetryResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     data: list[TelemetryDataPoint]
     start_time: datetime | None = None
     end_time: datetime | None = None
     total_points: int
 
 
+class TelemetryResponseColumnar(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    timestamps: list[datetime]
+    levels_q: list[int]  # Tank levels quantized to fixed point; multiply by scale
+    scale: float = 0.01
+    start_time: datetime | None = None
+    end_time: datetime | None = None
+    total_points: int
+
+
 class LatestReadingResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     timestamp: datetime
     urine_tank_level: float
     status: str = "active"  # active, stale, or live
 
 
-def create_app(
-    database: Database,
-    cors_origins: str = "http://localhost:3000",
-    enable_seed_endpoint: bool = True,
-    telemetry_service=None,
-) -> FastAPI:
-    app = FastAPI(title="pISSgraph API", description="ISS Urine Tank Telemetry Data API", version="1.0.0")
+# Handlers live at module scope (instead of closures recreated per
+# create_app call) and receive their collaborators via app.state
+
+
+def get_db(request: Request) -> Database:
+    return request.app.state.database
 
-    # Allow all origins for public API (includes PR preview domains)
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
 
-    @app.get("/telemetry", response_model=TelemetryResponse)
-    async def get_telemetry(
-        start_time: datetime | None = Query(None, description="Start time for data range"),
-        end_time: datetime | None = Query(None, description="End time for data range"),
-        hours: int | None = Query(None, description="Number of hours from now", ge=1, le=720),
-        limit: int = Query(1000, description="Maximum number of data points", ge=1, le=10000),
-    ) -> TelemetryResponse:
-        """Get ISS urine tank telemetry data"""
+def get_telemetry_service(request: Request) -> Any:
+    return request.app.state.telemetry_service
 
-        # If hours is specified, use it to set start_time
-        if hours is not None:
-            end_time = datetime.now(UTC)
-            start_time = end_time - timedelta(hours=hours)
 
-        readings = await database.get_readings(start_time, end_time, limit)
+def get_telemetry_cache(request: Request) -> TTLCache:
+    return request.app.state.telemetry_cache
 
+
+def _stream_telemetry_records(
+    data_points: list[dict[str, Any]],
+    start_time: datetime | None,
+    end_time: datetime | None,
+) -> Iterator[bytes]:
+    """Yield the records-layout JSON body in chunks of _STREAM_CHUNK points"""
+    yield b'{"data":['
+    first = True
+    for offset in range(0, len(data_points), _STREAM_CHUNK):
+        # Serialize a slice and strip the surrounding brackets
+        part = orjson.dumps(data_points[offset : offset + _STREAM_CHUNK], option=orjson.OPT_UTC_Z)[1:-1]
+        if part:
+            yield part if first else b"," + part
+            first = False
+    tail = orjson.dumps(
+        {"start_time": start_time, "end_time": end_time, "total_points": len(data_points)},
+        option=orjson.OPT_UTC_Z,
+    )
+    yield b"]," + tail[1:-1] + b"}"
+
+
+def _cache_headers(etag: str, telemetry_cache: TTLCache) -> dict[str, str]:
+    """Conditional-GET headers: weak validator plus a short client max-age"""
+    return {"ETag": etag, "Cache-Control": f"public, max-age={int(telemetry_cache.ttl) // 2}"}
+
+
+async def get_telemetry(
+    request: Request,
+    start_time: datetime | None = Query(None, description="Start time for data range"),
+    end_time: datetime | None = Query(None, description="End time for data range"),
+    hours: int | None = Query(None, description="Number of hours from now", ge=1, le=720),
+    limit: int = Query(1000, description="Maximum number of data points", ge=1, le=10000),
+    format: Literal["records", "columnar"] = Query(
+        "records", description="Response layout: array of points, or parallel timestamp/level arrays"
+    ),
+    database: Database = Depends(get_db),
+    telemetry_service: Any = Depends(get_telemetry_service),
+    telemetry_cache: TTLCache = Depends(get_telemetry_cache),
+) -> Response:
+    """Get ISS urine tank telemetry data"""
+    now = datetime.now(UTC)
+
+    # Normalize user-supplied naive datetimes once; everything downstream
+    # (including DB timestamps, stored timezone-aware) compares directly
+    if start_time and start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=UTC)
+    if end_time and end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=UTC)
+
+    # The database version invalidates cached bodies on any write; the raw
+    # hours parameter stands in for its derived, per-request time bounds
+    cache_key = (database.version, start_time, end_time, hours, limit, format)
+    cached = telemetry_cache.get(cache_key)
+    if cached is not None:
+        cached_body, etag = cached
+        headers = _cache_headers(etag, telemetry_cache)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached_body, media_type="application/json", headers=headers)
+
+    # If hours is specified, use it to set start_time
+    if hours is not None:
+        end_time = now
+        start_time = end_time - timedelta(hours=hours)
+
+    readings = await database.get_readings_rows(start_time, end_time, limit)
+
+    # Add current timestamp with latest value to show horizontal line to "now"
+    # This shows that the urine level is constant until the next change
+    extra_point: tuple[datetime, float] | None = None
+    if readings:
+        last_timestamp, last_level = readings[-1]  # Most recent reading
+
+        # Only add current timestamp if it's significantly newer than last reading
+        # and if we have a time range that includes "now"
+        time_diff = (now - last_timestamp).total_seconds()
+        includes_now = not end_time or (end_time - now).total_seconds() >= -10  # Allow 10 second buffer
+
+        if includes_now and time_diff > 60:  # More than 1 minute old
+            # Use live telemetry value if available, otherwise use last database value
+            current_value = last_level
+            if telemetry_service and telemetry_service.current_value is not None:
+                current_value = telemetry_service.current_value
+
+            extra_point = (now, current_value)
+
+    # Weak validator from the newest stored row and the row count. When a
+    # synthetic "now" point is appended the body keeps moving even though the
+    # stored data does not, so fold in a bucket that rolls over once per cache
+    # TTL — a tag built from the rows alone would let revalidating clients
+    # 304 forever and freeze the chart's last point at first-fetch time
+    if readings:
+        validator = f"{readings[-1][0].timestamp():.0f}-{len(readings)}"
+        if extra_point:
+            validator += f"-{int(now.timestamp() // telemetry_cache.ttl)}"
+        etag = f'W/"{validator}"'
+    else:
+        etag = 'W/"empty"'
+    headers = _cache_headers(etag, telemetry_cache)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if format == "columnar":
+        # Struct-of-arrays layout: no repeated field names, two C-level
+        # comprehensions, and arrays the frontend can chart directly.
+        # Levels ship as fixed-point ints (0.01% resolution) which are
+        # shorter on the wire than floats and lossless for a 0-100% gauge.
+        timestamps = [timestamp for timestamp, _ in readings]
+        levels_q = [round(level * 100) for _, level in readings]
+        if extra_point:
+            timestamps.append(extra_point[0])
+            levels_q.append(round(extra_point[1] * 100))
+        payload: dict[str, Any] = {
+            "timestamps": timestamps,
+            "levels_q": levels_q,
+            "scale": 0.01,
+            "start_time": start_time,
+            "end_time": end_time,
+            "total_points": len(timestamps),
+        }
+    else:
         data_points = [
-            TelemetryDataPoint(timestamp=reading.timestamp, urine_tank_level=reading.urine_tank_level)
-            for reading in reversed(readings)  # Reverse to get chronological order
+            {"timestamp": timestamp, "urine_tank_level": level}
+            for timestamp, level in readings  # Already in chronological order from SQL
         ]
-
-        # Add current timestamp with latest value to show horizontal line to "now"
-        # This shows that the urine level is constant until the next change
-        if data_points:
-            last_reading = data_points[-1]  # Most recent reading
-            current_time = datetime.now(UTC)
-
-            # Only add current timestamp if it's significantly newer than last reading
-            # and if we have a time range that includes "now"
-            # Ensure timestamp from database is timezone-aware
-            last_timestamp = (
-                last_reading.timestamp.replace(tzinfo=UTC)
-                if last_reading.timestamp.tzinfo is None
-                else last_reading.timestamp
+        if extra_point:
+            data_points.append({"timestamp": extra_point[0], "urine_tank_level": extra_point[1]})
+
+        # Large bodies stream chunk by chunk: first bytes go out before the
+        # tail is serialized, and peak memory stays at one chunk (not cached)
+        if len(data_points) > _STREAM_THRESHOLD:
+            return StreamingResponse(
+                _stream_telemetry_records(data_points, start_time, end_time),
+                media_type="application/json",
+                headers=headers,
             )
-            time_diff = (current_time - last_timestamp).total_seconds()
-            # Ensure both datetimes are timezone-aware for comparison
-            end_time_aware = end_time.replace(tzinfo=UTC) if end_time and end_time.tzinfo is None else end_time
-            includes_now = (
-                not end_time_aware or (end_time_aware - current_time).total_seconds() >= -10
-            )  # Allow 10 second buffer
-
-            if includes_now and time_diff > 60:  # More than 1 minute old
-                # Use live telemetry value if available, otherwise use last database value
-                current_value = last_reading.urine_tank_level
-                if telemetry_service and telemetry_service.current_value is not None:
-                    current_value = telemetry_service.current_value
-
-                data_points.append(TelemetryDataPoint(timestamp=current_time, urine_tank_level=current_value))
-
-        return TelemetryResponse(
-            data=data_points,
-            start_time=start_time,
-            end_time=end_time,
-            total_points=len(data_points),
-        )
-
-    @app.get("/telemetry/latest", response_model=LatestReadingResponse)
-    async def get_latest_telemetry() -> LatestReadingResponse:
-        """Get the latest ISS urine tank reading"""
-        reading = await database.get_latest_reading()
-
-        # If no database reading exists, try to get real-time data from telemetry service
-        if not reading and telemetry_service:
-            current_value = telemetry_service.current_value
-            if current_value is not None:
-                return LatestReadingResponse(timestamp=datetime.now(UTC), urine_tank_level=current_value, status="live")
-
-        if not reading:
-            raise HTTPException(status_code=404, detail="No telemetry data available")
-
-        # Consider data stale if older than 10 minutes
-        current_time = datetime.now(UTC)
-        reading_time = reading.timestamp.replace(tzinfo=UTC) if reading.timestamp.tzinfo is None else reading.timestamp
-        is_stale = (current_time - reading_time).total_seconds() > 600
-
-        return LatestReadingResponse(
-            timestamp=reading.timestamp,
-            urine_tank_level=reading.urine_tank_level,
-            status="stale" if is_stale else "active",
-        )
-
-    @app.get("/health")
-    async def health_check() -> dict[str, str]:
-        """Health check endpoint"""
-        return {"status": "healthy"}
 
-    if enable_seed_endpoint:
+        payload = {
+            "data": data_points,
+            "start_time": start_time,
+            "end_time": end_time,
+            "total_points": len(data_points),
+        }
+
+    # Serialize manually via orjson (handles datetime natively) instead of
+    # re-validating every data point through the Pydantic response model.
+    # OPT_UTC_Z keeps timestamps Z-suffixed like the Pydantic-encoded
+    # endpoints; the frontend appends "Z" to anything that lacks it, which
+    # would corrupt a "+00:00" offset form
+    body = orjson.dumps(payload, option=orjson.OPT_UTC_Z)
+    telemetry_cache[cache_key] = (body, etag)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def get_latest_telemetry(
+    request: Request,
+    response: Response,
+    database: Database = Depends(get_db),
+    telemetry_service: Any = Depends(get_telemetry_service),
+    telemetry_cache: TTLCache = Depends(get_telemetry_cache),
+) -> LatestReadingResponse | Response:
+    """Get the latest ISS urine tank reading"""
+    # Fast path: the telemetry service keeps an in-memory snapshot of the
+    # last stored reading; only fall back to SQL when it has none yet
+    reading = telemetry_service.latest_reading if telemetry_service else None
+    if reading is None:
+        reading = await database.get_latest_row()
+
+    # If no database reading exists, try to get real-time data from telemetry service
+    if not reading and telemetry_service:
+        current_value = telemetry_service.current_value
+        if current_value is not None:
+            return LatestReadingResponse(timestamp=datetime.now(UTC), urine_tank_level=current_value, status="live")
+
+    if not reading:
+        raise HTTPException(status_code=404, detail="No telemetry data available")
+
+    # Consider data stale if older than 10 minutes
+    is_stale = (datetime.now(UTC) - reading.timestamp).total_seconds() > 600
+    status = "stale" if is_stale else "active"
+
+    # Pollers mostly see unchanged data; let them short-circuit on the
+    # validator instead of re-downloading the same body
+    etag = f'W/"{reading.timestamp.timestamp():.0f}-{status}"'
+    headers = _cache_headers(etag, telemetry_cache)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    return LatestReadingResponse(
+        timestamp=reading.timestamp,
+        urine_tank_level=reading.urine_tank_level,
+        status=status,
+    )
 
-        @app.post("/telemetry/seed")
-        async def seed_telemetry() -> dict[str, str]:
-            """Seed database with sample telemetry data for testing"""
-            import random
-            from datetime import datetime
-            from datetime import timedelta
 
-            # Only allow seeding if database is empty
-            latest = await database.get_latest_reading()
-            if latest:
-                return {"message": "Database already contains data"}
+async def health_check() -> Response:
+    """Health check endpoint"""
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
-            # Create some sample data points over the last hour
-            now = datetime.now(UTC)
-            base_level = 45.0  # Start at 45%
 
-            for i in range(12):  # 12 data points over the last hour
-                timestamp = now - timedelta(minutes=60 - (i * 5))  # Every 5 minutes
-                # Add some random variation to make it realistic
-                level = base_level + random.uniform(-2.0, 2.0)
-                level = max(0, min(100, level))  # Clamp between 0-100%
+async def seed_telemetry(database: Database = Depends(get_db)) -> dict[str, str]:
+    """Seed database with sample telemetry data for testing"""
+    # Only allow seeding if database is empty
+    latest = await database.get_latest_reading()
+    if latest:
+        return {"message": "Database already contains data"}
 
-                from .database import TelemetryReading
+    # Create some sample data points over the last hour
+    now = datetime.now(UTC)
+    base_level = 45.0  # Start at 45%
 
-                reading = TelemetryReading(timestamp=timestamp, urine_tank_level=level)
-                await database.add_reading(reading)
+    readings = []
+    for i in range(12):  # 12 data points over the last hour
+        timestamp = now - timedelta(minutes=60 - (i * 5))  # Every 5 minutes
+        # Add some random variation to make it realistic
+        level = base_level + random.uniform(-2.0, 2.0)
+        level = max(0, min(100, level))  # Clamp between 0-100%
+        readings.append(TelemetryReading(timestamp=timestamp, urine_tank_level=level))
 
-            return {"message": "Sample telemetry data added"}
+    # Insert all points in one transaction instead of 12 separate commits
+    await database.add_readings(readings)
 
-        @app.delete("/telemetry/clear")
-        async def clear_telemetry() -> dict[str, str]:
-            """Clear all telemetry data from the database"""
-            deleted_count = await database.clear_all_readings()
-            return {"message": f"Cleared {deleted_count} telemetry readings"}
+    return {"message": "Sample telemetry data added"}
 
-    return app
 
+async def clear_telemetry(
+    database: Database = Depends(get_db),
+    telemetry_service: Any = Depends(get_telemetry_service),
+) -> dict[str, str]:
+    """Clear all telemetry data from the database"""
+    deleted_count = await database.clear_all_readings()
+    if telemetry_service:
+        telemetry_service.reset()
+    return {"message": f"Cleared {deleted_count} telemetry readings"}
+
+
+def create_app(
+    database: Database | None = None,
+    cors_origins: str = "http://localhost:3000",
+    enable_seed_endpoint: bool = True,
+    telemetry_service=None,
+) -> FastAPI:
+    """Create the FastAPI app
+
+    ``database`` may be None for schema-only uses (e.g. OpenAPI export);
+    it is only dereferenced when a request actually hits an endpoint.
+    """
+    app = FastAPI(
+        title="pISSgraph API",
+        description="ISS Urine Tank Telemetry Data API",
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+    )
+
+    # Normalize configured origins once: strip whitespace so middleware
+    # equality checks don't silently fail on entries like " http://x", and
+    # use a tuple for the per-request origin scan
+    origins = tuple(origin.strip() for origin in cors_origins.split(",") if origin.strip())
+    if not origins or "*" in origins:
+        origins = ("*",)  # Public API default (includes PR preview domains)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.state.database = database
+    app.state.telemetry_service = telemetry_service
+    # Telemetry only changes once per polling interval, so identical queries
+    # within that window can share one serialized response body
+    cache_ttl = telemetry_service.polling_interval if telemetry_service else 60
+    app.state.telemetry_cache = TTLCache(maxsize=256, ttl=cache_ttl)
+
+    # The response models are referenced here only for OpenAPI documentation;
+    # the handler builds plain dicts to avoid per-row model construction
+    app.add_api_route(
+        "/telemetry",
+        get_telemetry,
+        methods=["GET"],
+        responses={200: {"model": TelemetryResponse | TelemetryResponseColumnar}},
+    )
+    app.add_api_route(
+        "/telemetry/latest",
+        get_latest_telemetry,
+        methods=["GET"],
+        response_model=LatestReadingResponse,
+    )
+    app.add_api_route("/health", health_check, methods=["GET"])
+
+    if enable_seed_endpoint:
+        app.add_api_route("/telemetry/seed", seed_telemetry, methods=["POST"])
+        app.add_api_route("/telemetry/clear", clear_telemetry, methods=["DELETE"])
+
+    return app
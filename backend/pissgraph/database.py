@@ -1,11 +1,18 @@
+from datetime import UTC
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 from sqlalchemy import DateTime
 from sqlalchemy import Float
+from sqlalchemy import Index
 from sqlalchemy import Integer
+from sqlalchemy import Row
+from sqlalchemy import TypeDecorator
 from sqlalchemy import delete
+from sqlalchemy import event
 from sqlalchemy import select
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -18,52 +25,144 @@ class Base(DeclarativeBase):
     pass
 
 
+class UTCDateTime(TypeDecorator[datetime]):
+    """Store datetimes as naive UTC (SQLite has no offset support) and return them timezone-aware"""
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect: Any) -> datetime | None:
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value: datetime | None, dialect: Any) -> datetime | None:
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=UTC)
+        return value
+
+
 class TelemetryReading(Base):
     __tablename__ = "telemetry_readings"
 
+    # Covering index: the hot queries filter/order on timestamp and read only
+    # these two columns, so SQLite can answer them from the index B-tree
+    # without a rowid lookup into the table per row
+    __table_args__ = (Index("ix_telemetry_ts_level", "timestamp", "urine_tank_level"),)
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    # No single-column index on timestamp: the covering index already leads
+    # with it, and a second index would just double write-path maintenance
+    timestamp: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
     urine_tank_level: Mapped[float] = mapped_column(Float, nullable=False)
 
 
+def _configure_sqlite(dbapi_connection: Any, connection_record: Any) -> None:
+    """Apply performance PRAGMAs on every new SQLite connection
+
+    WAL mode lets readers run concurrently with the single writer, and
+    synchronous=NORMAL drops the full fsync per commit that WAL makes safe.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB
+    cursor.close()
+
+
 class Database:
     def __init__(self, database_path: str):
         # Ensure directory exists
         Path(database_path).parent.mkdir(parents=True, exist_ok=True)
 
-        self.engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", echo=False)
+        self.engine = create_async_engine(
+            f"sqlite+aiosqlite:///{database_path}",
+            echo=False,
+            connect_args={"check_same_thread": False},
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10,
+            pool_recycle=3600,
+        )
+        event.listen(self.engine.sync_engine, "connect", _configure_sqlite)
         self.session_maker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        # Monotonic write counter; response caches include it in their keys
+        # so cached entries are implicitly invalidated by any write
+        self.version = 0
 
     async def init(self) -> None:
         """Initialize database tables"""
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            # create_all skips tables that already exist, so databases created
+            # before the covering index was declared never get it; create it
+            # explicitly (and retire the old single-column index it replaces)
+            await conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_telemetry_ts_level "
+                    "ON telemetry_readings (timestamp, urine_tank_level)"
+                )
+            )
+            await conn.execute(text("DROP INDEX IF EXISTS ix_telemetry_readings_timestamp"))
+            # Refresh planner statistics so the covering index gets picked
+            await conn.execute(text("ANALYZE"))
 
     async def add_reading(self, reading: TelemetryReading) -> None:
         """Add a new telemetry reading"""
         async with self.session_maker() as session:
             session.add(reading)
             await session.commit()
+        self.version += 1
 
-    async def get_readings(
+    async def add_readings(self, readings: list[TelemetryReading]) -> None:
+        """Add multiple telemetry readings in a single transaction"""
+        async with self.session_maker() as session:
+            session.add_all(readings)
+            await session.commit()
+        self.version += 1
+
+    async def get_readings_rows(
         self,
         start_time: datetime | None = None,
         end_time: datetime | None = None,
         limit: int = 1000,
-    ) -> list[TelemetryReading]:
-        """Get telemetry readings within time range"""
-        async with self.session_maker() as session:
-            query = select(TelemetryReading)
+    ) -> list[Row[tuple[datetime, float]]]:
+        """Get (timestamp, urine_tank_level) rows within time range, in chronological order
+
+        Returns lightweight Core rows instead of full ORM entities; use this
+        for read-only paths that only serialize the values back out.
+        """
+        columns = (TelemetryReading.timestamp, TelemetryReading.urine_tank_level)
 
-            if start_time:
-                query = query.where(TelemetryReading.timestamp >= start_time)
+        if start_time:
+            query = select(*columns).where(TelemetryReading.timestamp >= start_time)
             if end_time:
                 query = query.where(TelemetryReading.timestamp <= end_time)
-
-            query = query.order_by(TelemetryReading.timestamp.desc()).limit(limit)
-
-            result = await session.execute(query)
-            return list(result.scalars().all())
+            query = query.order_by(TelemetryReading.timestamp.asc()).limit(limit)
+        else:
+            inner = select(*columns)
+            if end_time:
+                inner = inner.where(TelemetryReading.timestamp <= end_time)
+            subq = inner.order_by(TelemetryReading.timestamp.desc()).limit(limit).subquery()
+            query = select(subq.c.timestamp, subq.c.urine_tank_level).order_by(subq.c.timestamp.asc())
+
+        # Plain pooled connection; no session/unit-of-work needed for reads
+        async with self.engine.connect() as conn:
+            result = await conn.execute(query)
+            return list(result.all())
+
+    async def get_latest_row(self) -> Row[tuple[datetime, float]] | None:
+        """Get the most recent (timestamp, urine_tank_level) row"""
+        query = (
+            select(TelemetryReading.timestamp, TelemetryReading.urine_tank_level)
+            .order_by(TelemetryReading.timestamp.desc())
+            .limit(1)
+        )
+        async with self.engine.connect() as conn:
+            result = await conn.execute(query)
+            return result.first()
 
     async def get_latest_reading(self) -> TelemetryReading | None:
         """Get the most recent telemetry reading"""
@@ -78,7 +177,8 @@ class Database:
             query = delete(TelemetryReading)
             result = await session.execute(query)
             await session.commit()
-            return result.rowcount or 0
+        self.version += 1
+        return result.rowcount or 0
 
     async def close(self) -> None:
         """Close database connection"""
@@ -1,20 +1,17 @@
 """Export OpenAPI JSON schema without running the server."""
 
-import json
 import sys
 from pathlib import Path
 
+import orjson
+
 from .api import create_app
-from .database import Database
 
 
 def export_openapi_json(output_path: str) -> None:
     """Export OpenAPI JSON to file without starting the server."""
-    # Create a dummy database instance (won't be used)
-    database = Database(":memory:")
-
-    # Create the FastAPI app with seed endpoint enabled for OpenAPI documentation
-    app = create_app(database, enable_seed_endpoint=True, telemetry_service=None)
+    # No database needed for schema generation; routes are never invoked
+    app = create_app(database=None, enable_seed_endpoint=True, telemetry_service=None)
 
     # Generate OpenAPI JSON
     openapi_json = app.openapi()
@@ -24,8 +21,7 @@ def export_openapi_json(output_path: str) -> None:
     output_file.parent.mkdir(parents=True, exist_ok=True)
 
     # Write to file
-    with open(output_file, "w") as f:
-        json.dump(openapi_json, f, indent=2, default=str)
+    output_file.write_bytes(orjson.dumps(openapi_json, option=orjson.OPT_INDENT_2))
 
     print(f"OpenAPI JSON exported to {output_path}")
 
@@ -1,11 +1,12 @@
 import logging
 import os
 from collections.abc import AsyncGenerator
+from collections.abc import Callable
 from contextlib import asynccontextmanager
 from typing import Any
 
-import uvicorn
 from dotenv import load_dotenv
+from fastapi import FastAPI
 
 from .api import create_app
 from .database import Database
@@ -21,61 +22,93 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 PORT = int(os.getenv("PORT", "8000"))
+# Each worker runs its own lifespan, i.e. its own TelemetryService with its
+# own Lightstreamer connection and dedupe state — extra workers would insert
+# duplicate rows per value change. Keep the default at 1; raise it only
+# after moving telemetry collection out of the web workers.
+WORKERS = int(os.getenv("WORKERS", "1"))
 DATABASE_PATH = os.getenv("DATABASE_PATH", "./data/pissgraph.db")
 POLLING_INTERVAL = int(os.getenv("POLLING_INTERVAL", "60"))
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000")
-# Always allow all h4ks.com subdomains for preview deployments
-if not CORS_ORIGINS or CORS_ORIGINS == "":
-    CORS_ORIGINS = "*"
+# "stream" (default) keeps the telemetry WebSocket open; "poll" reconnects
+# once per interval and drops the connection between samples
+TELEMETRY_MODE = os.getenv("TELEMETRY_MODE", "stream").lower()
+# Replace the telemetry WebSocket with a fresh one this often; 0 disables
+TELEMETRY_ROTATE_SEC = int(os.getenv("TELEMETRY_ROTATE_SEC", "3600"))
+# Default to allow-all: this is a public API and preview deployments live
+# on changing subdomains; set CORS_ORIGINS to restrict
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*") or "*"
 ENABLE_SEED_ENDPOINT = os.getenv("ENABLE_SEED_ENDPOINT", "true").lower() == "true"
 
-# Global services
-database = Database(DATABASE_PATH)
-telemetry_service = TelemetryService(database, POLLING_INTERVAL)
 
-
-@asynccontextmanager
-async def lifespan(app: Any) -> AsyncGenerator[None, None]:
-    """Application lifespan manager"""
-    logger.info("Starting pISSgraph backend...")
-
-    # Start telemetry service in background without blocking startup
-    try:
-        await telemetry_service.start()
-        logger.info(
-            f"Telemetry service initialization completed "
-            f"(running in background with {POLLING_INTERVAL}s polling interval)"
-        )
-    except Exception as e:
-        logger.error(f"Failed to start telemetry service: {e}")
-        logger.info("API will still be available, but telemetry data collection is disabled")
-
-    logger.info("Backend startup complete - API endpoints are ready")
-    yield
-
-    logger.info("Shutting down pISSgraph backend...")
-    try:
-        await telemetry_service.stop()
-        logger.info("Telemetry service stopped")
-    except Exception as e:
-        logger.error(f"Error stopping telemetry service: {e}")
-
-    try:
-        await database.close()
-        logger.info("Database connection closed")
-    except Exception as e:
-        logger.error(f"Error closing database: {e}")
-
-    logger.info("Backend shutdown complete")
-
-
-app = create_app(database, CORS_ORIGINS, ENABLE_SEED_ENDPOINT, telemetry_service)
-app.router.lifespan_context = lifespan
+def _make_lifespan(database: Database, telemetry_service: TelemetryService) -> Callable[[Any], Any]:
+    @asynccontextmanager
+    async def lifespan(app: Any) -> AsyncGenerator[None, None]:
+        """Application lifespan manager"""
+        logger.info("Starting pISSgraph backend...")
+
+        # Start telemetry service in background without blocking startup
+        try:
+            await telemetry_service.start()
+            logger.info(
+                f"Telemetry service initialization completed "
+                f"(running in background with {POLLING_INTERVAL}s polling interval)"
+            )
+        except Exception as e:
+            logger.error(f"Failed to start telemetry service: {e}")
+            logger.info("API will still be available, but telemetry data collection is disabled")
+
+        logger.info("Backend startup complete - API endpoints are ready")
+        yield
+
+        logger.info("Shutting down pISSgraph backend...")
+        try:
+            await telemetry_service.stop()
+            logger.info("Telemetry service stopped")
+        except Exception as e:
+            logger.error(f"Error stopping telemetry service: {e}")
+
+        try:
+            await database.close()
+            logger.info("Database connection closed")
+        except Exception as e:
+            logger.error(f"Error closing database: {e}")
+
+        logger.info("Backend shutdown complete")
+
+    return lifespan
+
+
+def build_app() -> FastAPI:
+    """Construct the application and its services
+
+    Called once per worker process by uvicorn (factory=True), so importing
+    this module stays side-effect free: no engine, no client threads, no
+    route registration until a server actually starts.
+    """
+    database = Database(DATABASE_PATH)
+    telemetry_service = TelemetryService(
+        database, POLLING_INTERVAL, mode=TELEMETRY_MODE, rotate_interval=TELEMETRY_ROTATE_SEC
+    )
+    app = create_app(database, CORS_ORIGINS, ENABLE_SEED_ENDPOINT, telemetry_service)
+    app.router.lifespan_context = _make_lifespan(database, telemetry_service)
+    return app
 
 
 def run() -> None:
     """Run the application"""
-    uvicorn.run("pissgraph.main:app", host="0.0.0.0", port=PORT, reload=False, log_level="info")
+    import uvicorn
+
+    uvicorn.run(
+        "pissgraph.main:build_app",
+        factory=True,
+        host="0.0.0.0",
+        port=PORT,
+        reload=False,
+        workers=WORKERS,
+        loop="uvloop",
+        http="httptools",
+        log_level="info",
+    )
 
 
 if __name__ == "__main__":
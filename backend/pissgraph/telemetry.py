@@ -1,6 +1,8 @@
 import asyncio
 import contextlib
 import logging
+import time
+from datetime import UTC
 from datetime import datetime
 from typing import Any
 
@@ -14,202 +16,411 @@ logger = logging.getLogger(__name__)
 
 URINE_TANK_NODE = "NODE3000005"
 
+# Burst coalescing: keep draining the queue while values arrive within this
+# window (seconds), up to this many rows, and store them in one transaction
+_COALESCE_WINDOW = 0.2
+_MAX_WRITE_BATCH = 32
+
+# Drop a connection that has pushed nothing for this long (seconds). Silence
+# is normal here — the MERGE subscription conflates unchanged values and ISS
+# loss-of-signal gaps routinely exceed several minutes — so the threshold sits
+# well beyond routine quiet periods, not at a multiple of the polling interval
+_STALE_AFTER = 1800.0
+
+
+class _ConnectionListener:
+    """Resolves the pending connection future from the Lightstreamer client thread
+
+    Defined at module scope so the type object is built once instead of on
+    every reconnect.
+    """
+
+    __slots__ = ("future", "loop", "status_changes")
+
+    def __init__(self, future: "asyncio.Future[bool]", loop: asyncio.AbstractEventLoop, status_changes: list[str]):
+        self.future = future
+        self.loop = loop
+        self.status_changes = status_changes
+
+    def _resolve(self, result: bool) -> None:
+        # Runs on the loop thread via call_soon_threadsafe
+        if not self.future.done():
+            self.future.set_result(result)
+
+    def onStatusChange(self, new_status: str) -> None:
+        # Called from the Lightstreamer client thread; setting an
+        # asyncio.Future directly from here would race the loop
+        self.status_changes.append(new_status)
+        logger.info("Lightstreamer connection status: %s", new_status)
+
+        if new_status == "CONNECTED:WS-STREAMING":
+            logger.info("Successfully established WebSocket streaming connection")
+            self.loop.call_soon_threadsafe(self._resolve, True)
+        elif new_status.startswith("DISCONNECTED"):
+            logger.warning("Connection disconnected: %s", new_status)
+            self.loop.call_soon_threadsafe(self._resolve, False)
+        elif "ERROR" in new_status:
+            logger.error("Connection error: %s", new_status)
+            self.loop.call_soon_threadsafe(self._resolve, False)
+
+
+class _TelemetryListener:
+    """Forwards raw item updates from the client thread to the event loop"""
+
+    __slots__ = ("loop", "service")
+
+    def __init__(self, service: "TelemetryService", loop: asyncio.AbstractEventLoop):
+        self.service = service
+        self.loop = loop
+
+    def onItemUpdate(self, update: Any) -> None:
+        # Keep the dispatcher-thread work minimal: read the raw value and
+        # hand off. Parsing and logging run on the event-loop thread in
+        # _ingest_raw. No item name to read: the subscription carries a
+        # single item, so every update is for URINE_TANK_NODE by construction.
+        try:
+            self.loop.call_soon_threadsafe(self.service._ingest_raw, update.getValue("Value"))
+        except Exception as e:
+            logger.error("Error processing telemetry update: %s: %s", type(e).__name__, e)
+
 
 class TelemetryService:
-    def __init__(self, db: Database, polling_interval: int = 60):
+    # Fixed attribute set: slots give C-array attribute access on the hot
+    # update path and skip the per-instance __dict__
+    __slots__ = (
+        "_connect_lock",
+        "_connected_event",
+        "_consumer_task",
+        "_debug",
+        "_initial_data_event",
+        "_last_stored_value",
+        "_last_update_ts",
+        "_rotator_task",
+        "_update_queue",
+        "client",
+        "current_value",
+        "db",
+        "latest_reading",
+        "mode",
+        "polling_interval",
+        "rotate_interval",
+        "subscription",
+    )
+
+    def __init__(self, db: Database, polling_interval: int = 60, mode: str = "stream", rotate_interval: int = 3600):
         self.db = db
         self.polling_interval = polling_interval
+        # "stream" keeps the WebSocket (and its client thread) alive and
+        # stores pushed changes as they arrive; "poll" connects once per
+        # interval, harvests a sample and disconnects, paying a handshake
+        # per cycle instead of constant connection upkeep
+        self.mode = mode
+        # Replace the live connection with a fresh one this often (seconds);
+        # 0 disables rotation. Only applies in stream mode.
+        self.rotate_interval = rotate_interval
         self.client: LightstreamerClient | None = None
         self.subscription: Subscription | None = None
-        self.connected = False
+        # Set while a connection is live; is_set() is the lock-free fast
+        # path for _ensure_connected
+        self._connected_event = asyncio.Event()
         self.current_value: float | None = None
+        # Snapshot of the most recently stored reading; lets the API answer
+        # /telemetry/latest without a database round-trip
+        self.latest_reading: TelemetryReading | None = None
+        # Last value written to the database; the only point that needs a
+        # DB read for this is startup
+        self._last_stored_value: float | None = None
+        # Monotonic time of the last pushed update; the consumer heartbeat
+        # uses it to detect a connection that is up but silently stale
+        self._last_update_ts = time.monotonic()
         self._connect_lock = asyncio.Lock()
-        self._polling_task: asyncio.Task[None] | None = None
+        self._consumer_task: asyncio.Task[None] | None = None
+        self._rotator_task: asyncio.Task[None] | None = None
+        # Set the first time a valid telemetry value arrives
+        self._initial_data_event = asyncio.Event()
+        # Changed values pushed by the Lightstreamer listener; the consumer
+        # task stores them as they arrive instead of polling on a timer
+        self._update_queue: asyncio.Queue[float] = asyncio.Queue(maxsize=64)
+        # Snapshot of the effective level so the per-update debug lines cost
+        # one slot load instead of a logger call; taken here rather than at
+        # module import, which would run before logging is configured
+        self._debug = logger.isEnabledFor(logging.DEBUG)
 
     async def start(self) -> None:
-        """Start the telemetry polling service"""
+        """Start the telemetry service"""
         logger.info("Initializing telemetry service...")
         await self.db.init()
-
-        # Start the polling loop in background without waiting for initial connection
-        logger.info("Starting telemetry polling in background")
-        self._polling_task = asyncio.create_task(self._polling_loop())
+        self.latest_reading = await self.db.get_latest_reading()
+        if self.latest_reading:
+            self._last_stored_value = self.latest_reading.urine_tank_level
+
+        # Start the consumer loop in background without waiting for initial connection
+        if self.mode == "poll":
+            logger.info("Starting telemetry poller in background (connect-per-cycle mode)")
+            self._consumer_task = asyncio.create_task(self._poll_loop())
+        else:
+            logger.info("Starting telemetry consumer in background")
+            self._consumer_task = asyncio.create_task(self._consumer_loop())
+            if self.rotate_interval > 0:
+                self._rotator_task = asyncio.create_task(self._rotate_loop())
         logger.info("Telemetry service started successfully")
 
+    def reset(self) -> None:
+        """Forget stored-reading state after the database has been cleared
+
+        Clearing _last_stored_value re-arms the change dedupe, so the next
+        pushed value is stored even if the tank level has not moved.
+        """
+        self.latest_reading = None
+        self._last_stored_value = None
+
     async def stop(self) -> None:
         """Stop the telemetry service"""
-        if self._polling_task:
-            self._polling_task.cancel()
+        if self._rotator_task:
+            self._rotator_task.cancel()
             with contextlib.suppress(asyncio.CancelledError):
-                await self._polling_task
+                await self._rotator_task
+        if self._consumer_task:
+            self._consumer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._consumer_task
         self._disconnect()
 
-    async def _polling_loop(self) -> None:
-        """Main polling loop that runs every interval"""
+    async def _consumer_loop(self) -> None:
+        """Store pushed value changes as they arrive
+
+        The subscription is already an event stream, so there is nothing to
+        poll: the loop sleeps on the queue until the listener pushes a changed
+        value. polling_interval only bounds the wait so the loop still gets a
+        heartbeat tick to re-establish a dropped connection.
+        """
+        while True:
+            try:
+                if not await self._ensure_connected():
+                    logger.warning("Could not connect to Lightstreamer, will retry")
+                    await asyncio.sleep(self.polling_interval)
+                    continue
+
+                try:
+                    value = await asyncio.wait_for(self._update_queue.get(), timeout=self.polling_interval)
+                except asyncio.TimeoutError:
+                    # Heartbeat tick; no new value pushed. A socket can die
+                    # without a status change, so treat a long silence as a
+                    # stale connection and force a reconnect on the next tick.
+                    if self.connected and time.monotonic() - self._last_update_ts > _STALE_AFTER:
+                        logger.warning(
+                            "No telemetry updates for over %ss, dropping stale connection to force a reconnect",
+                            int(_STALE_AFTER),
+                        )
+                        self._disconnect()
+                    continue
+
+                # Coalesce a burst of changes into one transaction: each
+                # separate commit costs an fsync, a batched insert costs one
+                batch = [value]
+                while len(batch) < _MAX_WRITE_BATCH:
+                    try:
+                        batch.append(await asyncio.wait_for(self._update_queue.get(), timeout=_COALESCE_WINDOW))
+                    except asyncio.TimeoutError:
+                        break
+
+                if len(batch) == 1:
+                    await self._store_value(batch[0])
+                    logger.info("Stored new urine tank level: %s%%", batch[0])
+                else:
+                    await self._store_values(batch)
+                    logger.info("Stored %s urine tank levels (burst), latest: %s%%", len(batch), batch[-1])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Error in telemetry consumer loop: %s", e)
+                await asyncio.sleep(self.polling_interval)
+
+    async def _poll_loop(self) -> None:
+        """Connect, sample and disconnect once per interval (poll mode)"""
         while True:
             try:
-                await self._poll_telemetry()
+                await self._poll_once()
                 await asyncio.sleep(self.polling_interval)
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in polling loop: {e}")
+                logger.error("Error in telemetry poll loop: %s", e)
                 await asyncio.sleep(self.polling_interval)
 
-    async def _poll_telemetry(self) -> None:
-        """Poll telemetry data and store if changed"""
+    async def _poll_once(self) -> None:
+        """Harvest a single sample over a fresh connection and store it if changed"""
+        self._initial_data_event.clear()
+        if not await self._ensure_connected():
+            logger.warning("Could not connect to Lightstreamer, will retry next cycle")
+            return
+
         try:
-            logger.debug("Starting telemetry poll cycle")
-            value = await self._get_current_value()
-            if value is not None:
-                # Check if database is empty to always store first value
-                latest_db_reading = await self.db.get_latest_reading()
-
-                # Store if: database is empty OR value has changed from last stored value
-                should_store = False
-                if latest_db_reading is None:
-                    # Database is empty, store the first value
-                    should_store = True
-                    logger.info(f"Database empty, storing initial value: {value}%")
-                elif value != latest_db_reading.urine_tank_level:
-                    # Value changed from last stored value
-                    should_store = True
-                    logger.info(f"Value changed from {latest_db_reading.urine_tank_level}% to {value}%")
-                else:
-                    logger.debug(f"Value unchanged at {value}%, no storage needed")
+            try:
+                await asyncio.wait_for(self._initial_data_event.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.debug("No telemetry value received within the poll window")
+                return
 
-                if should_store:
-                    await self._store_value(value)
-                    logger.info(f"Stored new urine tank level: {value}%")
-            else:
-                logger.debug("No telemetry value available, connection may still be establishing")
-        except Exception as e:
-            logger.error(f"Failed to poll telemetry: {type(e).__name__}: {e}")
+            value = self.current_value
+            if value is not None and value != self._last_stored_value:
+                await self._store_value(value)
+                logger.info("Stored new urine tank level: %s%%", value)
+        finally:
+            self._disconnect()
 
-    async def _get_current_value(self) -> float | None:
-        """Get current telemetry value from Lightstreamer"""
-        if not await self._ensure_connected():
-            logger.warning("Could not connect to Lightstreamer, will retry on next poll")
-            return None
-
-        # Wait briefly for initial data if we don't have any yet (non-blocking)
-        if self.current_value is None:
-            logger.debug("Waiting briefly for initial telemetry data...")
-            for attempt in range(5):  # Wait up to 5 seconds for initial data
-                await asyncio.sleep(1)
-                if self.current_value is not None:
-                    logger.info(f"Received initial telemetry data: {self.current_value}%")
-                    break
-            else:
-                logger.debug("No initial telemetry data received yet, will keep trying")
-
-        return self.current_value
+    @property
+    def connected(self) -> bool:
+        return self._connected_event.is_set()
 
     async def _ensure_connected(self) -> bool:
         """Ensure connection to NASA telemetry stream"""
-        if self.connected and self.client:
+        # Fast path: a plain flag check, no lock acquisition while connected
+        if self._connected_event.is_set() and self.client:
             return True
 
+        # Slow path: exactly one caller runs the reconnect, later callers
+        # re-check the flag once they get the lock
         async with self._connect_lock:
-            if self.connected and self.client:
+            if self._connected_event.is_set() and self.client:
                 return True
             return await self._connect()
 
     async def _connect(self) -> bool:
         """Connect to NASA's ISS telemetry stream"""
+        opened = await self._open_connection()
+        if opened is None:
+            self._connected_event.clear()
+            return False
+
+        self.client, self.subscription = opened
+        # Restart the staleness clock, otherwise the watchdog would drop a
+        # fresh connection that simply has not pushed anything yet
+        self._last_update_ts = time.monotonic()
+        self._connected_event.set()
+        logger.info("Successfully connected to ISS telemetry stream and subscribed to data")
+        return True
+
+    async def _open_connection(self) -> tuple[LightstreamerClient, Subscription] | None:
+        """Build, connect and subscribe a fresh client; returns None on failure
+
+        Does not touch self.client/self.subscription, so a replacement
+        connection can be prepared while the current one keeps streaming.
+        """
         try:
             logger.info("Attempting to connect to NASA ISS telemetry stream...")
             logger.debug("Creating Lightstreamer client for https://push.lightstreamer.com with adapter ISSLIVE")
 
-            self.client = LightstreamerClient("https://push.lightstreamer.com", "ISSLIVE")
-
-            connection_future: asyncio.Future[bool] = asyncio.Future()
-            status_changes = []
-
-            class ConnectionListener:
-                def onStatusChange(self, new_status: str) -> None:
-                    status_changes.append(new_status)
-                    logger.info(f"Lightstreamer connection status: {new_status}")
-
-                    if new_status == "CONNECTED:WS-STREAMING":
-                        logger.info("Successfully established WebSocket streaming connection")
-                        if not connection_future.done():
-                            connection_future.set_result(True)
-                    elif new_status.startswith("DISCONNECTED"):
-                        logger.warning(f"Connection disconnected: {new_status}")
-                        if not connection_future.done():
-                            connection_future.set_result(False)
-                    elif "ERROR" in new_status:
-                        logger.error(f"Connection error: {new_status}")
-                        if not connection_future.done():
-                            connection_future.set_result(False)
-
-            self.client.addListener(ConnectionListener())
+            client = LightstreamerClient("https://push.lightstreamer.com", "ISSLIVE")
+
+            loop = asyncio.get_running_loop()
+            connection_future: asyncio.Future[bool] = loop.create_future()
+            status_changes: list[str] = []
+
+            client.addListener(_ConnectionListener(connection_future, loop, status_changes))
             logger.debug("Starting Lightstreamer client connection...")
-            self.client.connect()
+            client.connect()
 
             try:
                 logger.info("Waiting up to 15 seconds for connection establishment...")
                 result = await asyncio.wait_for(connection_future, timeout=15.0)
                 if result:
-                    self.connected = True
                     logger.info("Connection established, setting up telemetry subscription...")
-                    await self._subscribe_telemetry()
-                    logger.info("Successfully connected to ISS telemetry stream and subscribed to data")
-                    return True
+                    logger.info("Subscribing to telemetry node: %s", URINE_TANK_NODE)
+                    subscription = Subscription("MERGE", [URINE_TANK_NODE], ["Value"])
+                    # Throttle server-side: we only store changes sampled at
+                    # polling_interval, so ask for at most one update per
+                    # interval instead of every server tick, plus the current
+                    # value as an initial snapshot
+                    subscription.setRequestedMaxFrequency(str(1.0 / self.polling_interval))
+                    subscription.setRequestedSnapshot("yes")
+                    subscription.addListener(_TelemetryListener(self, loop))
+                    client.subscribe(subscription)
+                    logger.info("Telemetry subscription activated")
+                    return client, subscription
                 else:
-                    logger.error(f"Connection failed. Status history: {status_changes}")
+                    logger.error("Connection failed. Status history: %s", status_changes)
             except asyncio.TimeoutError:
-                logger.error(f"Connection timed out after 15 seconds. Status history: {status_changes}")
+                logger.error("Connection timed out after 15 seconds. Status history: %s", status_changes)
                 logger.error("This might be due to network restrictions, firewall, or VPS network configuration")
-                if self.client:
-                    try:
-                        self.client.disconnect()
-                    except Exception as disconnect_error:
-                        logger.debug(f"Error during disconnect cleanup: {disconnect_error}")
+                try:
+                    client.disconnect()
+                except Exception as disconnect_error:
+                    logger.debug("Error during disconnect cleanup: %s", disconnect_error)
 
         except Exception as e:
-            logger.error(f"Exception during Lightstreamer connection: {type(e).__name__}: {e}")
+            logger.error("Exception during Lightstreamer connection: %s: %s", type(e).__name__, e)
             logger.error("This could be due to missing dependencies, network issues, or VPS restrictions")
 
-        self.connected = False
-        return False
+        return None
 
-    async def _subscribe_telemetry(self) -> None:
-        """Subscribe to ISS urine tank telemetry"""
-        if not self.client:
-            return
+    async def _rotate_loop(self) -> None:
+        """Periodically replace the live connection with a freshly opened one
 
-        logger.info(f"Subscribing to telemetry node: {URINE_TANK_NODE}")
-        self.subscription = Subscription("MERGE", [URINE_TANK_NODE], ["Value"])
+        Long-lived WebSockets accumulate proxy/NAT state and drift; rotating
+        on a timer resets that. The replacement is fully connected and
+        subscribed before the swap, so the handshake latency is hidden and
+        the update stream never pauses for it.
+        """
+        while True:
+            try:
+                await asyncio.sleep(self.rotate_interval)
+                if not self._connected_event.is_set():
+                    continue  # the consumer heartbeat handles reconnects
+
+                logger.info("Rotating Lightstreamer connection")
+                opened = await self._open_connection()
+                if opened is None:
+                    logger.warning("Connection rotation failed, keeping current connection")
+                    continue
+
+                old_client, old_subscription = self.client, self.subscription
+                self.client, self.subscription = opened
+                if old_client:
+                    try:
+                        if old_subscription:
+                            old_client.unsubscribe(old_subscription)
+                        old_client.disconnect()
+                    except Exception as e:
+                        logger.debug("Error closing rotated-out connection: %s", e)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Error in connection rotation loop: %s", e)
 
-        class TelemetryListener:
-            def __init__(self, service: "TelemetryService"):
-                self.service = service
+    def _ingest_raw(self, raw: Any) -> None:
+        """Parse and apply a raw pushed update; runs on the event-loop thread"""
+        if self._debug:
+            logger.debug("Received update for %s with value: %s", URINE_TANK_NODE, raw)
 
-            def onItemUpdate(self, update: Any) -> None:
-                try:
-                    item_name = update.getItemName()
-                    value = update.getValue("Value")
-                    logger.debug(f"Received update for item {item_name} with value: {value}")
-
-                    if value is not None and item_name == URINE_TANK_NODE:
-                        try:
-                            new_value = float(value)
-                            logger.info(f"Received telemetry update for {URINE_TANK_NODE}: {new_value}%")
-                            self.service.current_value = new_value
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"Invalid telemetry value received for {item_name}: {value} - {e}")
-                    else:
-                        logger.debug(
-                            f"Ignoring update for different item or null value: item={item_name}, value={value}"
-                        )
-                except Exception as e:
-                    logger.error(f"Error processing telemetry update: {type(e).__name__}: {e}")
+        if raw is None:
+            if self._debug:
+                logger.debug("Ignoring null telemetry value")
+            return
 
-        self.subscription.addListener(TelemetryListener(self))
-        self.client.subscribe(self.subscription)
-        logger.info("Telemetry subscription activated")
+        try:
+            new_value = float(raw)
+        except (ValueError, TypeError) as e:
+            logger.warning("Invalid telemetry value received for %s: %s - %s", URINE_TANK_NODE, raw, e)
+            return
+
+        logger.info("Received telemetry update for %s: %s%%", URINE_TANK_NODE, new_value)
+        self._apply_update(new_value)
+
+    def _apply_update(self, new_value: float) -> None:
+        """Apply a pushed telemetry value; always runs on the event-loop thread"""
+        self._last_update_ts = time.monotonic()
+        self.current_value = new_value
+        # Only enqueue values that differ from the last stored one; unchanged
+        # pushes cost nothing. Checked against the stored value rather than
+        # current_value so a reset() re-arms storage even if the live value
+        # has not moved since.
+        if self._last_stored_value != new_value:
+            try:
+                self._update_queue.put_nowait(new_value)
+            except asyncio.QueueFull:
+                logger.warning("Telemetry update queue full, dropping value %s%%", new_value)
+        self._initial_data_event.set()
 
     def _disconnect(self) -> None:
         """Disconnect from telemetry stream"""
@@ -217,9 +428,19 @@ class TelemetryService:
             self.client.unsubscribe(self.subscription)
         if self.client:
             self.client.disconnect()
-        self.connected = False
+        self._connected_event.clear()
 
     async def _store_value(self, value: float) -> None:
         """Store telemetry value in database"""
-        reading = TelemetryReading(timestamp=datetime.utcnow(), urine_tank_level=value)
+        reading = TelemetryReading(timestamp=datetime.now(UTC), urine_tank_level=value)
         await self.db.add_reading(reading)
+        # Single attribute assignments are atomic under the GIL
+        self.latest_reading = reading
+        self._last_stored_value = value
+
+    async def _store_values(self, values: list[float]) -> None:
+        """Store a burst of telemetry values in one transaction"""
+        readings = [TelemetryReading(timestamp=datetime.now(UTC), urine_tank_level=value) for value in values]
+        await self.db.add_readings(readings)
+        self.latest_reading = readings[-1]
+        self._last_stored_value = values[-1]